@@ -12,18 +12,39 @@ Usage:
     from antigravity_replay_client import AntigravityReplayClient
     client = AntigravityReplayClient.from_captured_session()
     response = await client.chat("Hello!")
+    
+    # Or stream the response as it arrives:
+    async for text in client.chat_stream("Hello!"):
+        print(text, end="")
 """
 
 import asyncio
+import atexit
+import functools
 import json
+import logging
 import os
 import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
 
 import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _loads = json.loads
+    _dumps = json.dumps
+
+logger = logging.getLogger("antigravity.replay")
 
 # =============================================================================
 # CONFIGURATION
@@ -40,27 +61,112 @@ GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
 CODE_ASSIST_BASE = "https://cloudaicompanion.googleapis.com/v1"
 
 
-@dataclass
+@functools.lru_cache(maxsize=8)
+def _stream_url(model: str) -> str:
+    """Streaming generateContent URL for a model (cached per model)"""
+    return f"{GEMINI_API_BASE}/models/{model}:streamGenerateContent?alt=sse"
+
+
+# =============================================================================
+# SHARED HTTP SESSION
+# =============================================================================
+
+# One process-wide session so TCP/TLS connections to the API are kept alive
+# and reused across clients. Headers are passed per request, so clients with
+# different captured sessions can share the same connection pool.
+_SHARED_SESSION: Optional[aiohttp.ClientSession] = None
+_SHARED_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_shared_session() -> aiohttp.ClientSession:
+    """Get or create the process-wide HTTP session for the running loop"""
+    global _SHARED_SESSION, _SHARED_SESSION_LOOP
+    
+    loop = asyncio.get_running_loop()
+    if (
+        _SHARED_SESSION is None
+        or _SHARED_SESSION.closed
+        or _SHARED_SESSION_LOOP is not loop
+    ):
+        _SHARED_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            ),
+            timeout=aiohttp.ClientTimeout(total=120),
+            json_serialize=_dumps,
+        )
+        _SHARED_SESSION_LOOP = loop
+    return _SHARED_SESSION
+
+
+async def close_shared_session():
+    """Close the process-wide HTTP session (call once at shutdown)"""
+    global _SHARED_SESSION, _SHARED_SESSION_LOOP
+    
+    if _SHARED_SESSION is not None and not _SHARED_SESSION.closed:
+        await _SHARED_SESSION.close()
+    _SHARED_SESSION = None
+    _SHARED_SESSION_LOOP = None
+
+
+@atexit.register
+def _close_shared_session_at_exit():
+    """Best-effort cleanup if the owner never awaited close_shared_session()"""
+    loop = _SHARED_SESSION_LOOP
+    if loop is None or loop.is_closed() or loop.is_running():
+        return
+    loop.run_until_complete(close_shared_session())
+
+
+@dataclass(frozen=True)
 class CapturedSession:
-    """Captured Antigravity session with auth and headers"""
+    """Captured Antigravity session with auth and headers
+    
+    Immutable, so the prebuilt request headers can't go stale; create a new
+    session (e.g. dataclasses.replace) to use a refreshed token.
+    """
     access_token: str
-    headers: Dict[str, str]
+    headers: Mapping[str, str]
     endpoints: List[Dict[str, Any]] = field(default_factory=list)
     captured_at: Optional[str] = None
+    _request_headers: "CIMultiDictProxy[str]" = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # Keep a read-only copy so the caller's dict can't change it later
+        object.__setattr__(self, "headers", MappingProxyType(dict(self.headers)))
+        
+        # Build request headers once, in the case-insensitive form aiohttp
+        # uses internally; they are static for the session
+        headers: "CIMultiDict[str]" = CIMultiDict({
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+        })
+        
+        # Add captured headers (these are the IDE-identifying headers),
+        # skipping authorization since we set it above
+        headers.update(
+            (key, value) for key, value in self.headers.items()
+            if key.lower() != "authorization"
+        )
+        
+        object.__setattr__(self, "_request_headers", CIMultiDictProxy(headers))
     
     @classmethod
     def from_files(cls, session_file: Optional[Path] = None) -> "CapturedSession":
         """Load from captured session files"""
         session_file = session_file or DEFAULT_SESSION_FILE
         
-        if not session_file.exists():
+        try:
+            data = _loads(session_file.read_bytes())
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"Session file not found: {session_file}\n"
                 f"Run antigravity-proxy-capture.sh first to capture credentials."
-            )
-        
-        with open(session_file) as f:
-            data = json.load(f)
+            ) from None
         
         # Extract latest token
         tokens = data.get("tokens", [])
@@ -74,10 +180,10 @@ class CapturedSession:
         headers = data.get("headers", {})
         
         # Also try dedicated headers file
-        if DEFAULT_HEADERS_FILE.exists():
-            with open(DEFAULT_HEADERS_FILE) as f:
-                file_headers = json.load(f)
-                headers.update(file_headers)
+        try:
+            headers.update(_loads(DEFAULT_HEADERS_FILE.read_bytes()))
+        except FileNotFoundError:
+            pass
         
         return cls(
             access_token=access_token,
@@ -86,21 +192,9 @@ class CapturedSession:
             captured_at=latest_token.get("captured_at"),
         )
     
-    def get_request_headers(self) -> Dict[str, str]:
-        """Get headers for making requests"""
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
-        
-        # Add captured headers (these are the IDE-identifying headers)
-        for key, value in self.headers.items():
-            # Skip authorization (we set it above)
-            if key.lower() == "authorization":
-                continue
-            headers[key] = value
-        
-        return headers
+    def get_request_headers(self) -> "CIMultiDictProxy[str]":
+        """Get headers for making requests (read-only, built at construction)"""
+        return self._request_headers
 
 
 class AntigravityReplayClient:
@@ -113,7 +207,6 @@ class AntigravityReplayClient:
     
     def __init__(self, session: CapturedSession):
         self.session = session
-        self._http_session: Optional[aiohttp.ClientSession] = None
     
     @classmethod
     def from_captured_session(
@@ -133,40 +226,23 @@ class AntigravityReplayClient:
         return cls.from_captured_session()
     
     async def _get_http_session(self) -> aiohttp.ClientSession:
-        """Get or create HTTP session"""
-        if self._http_session is None or self._http_session.closed:
-            self._http_session = aiohttp.ClientSession(
-                headers=self.session.get_request_headers(),
-                timeout=aiohttp.ClientTimeout(total=120),
-            )
-        return self._http_session
+        """Get the shared HTTP session (headers are sent per request)"""
+        return await get_shared_session()
     
     async def close(self):
-        """Close HTTP session"""
-        if self._http_session and not self._http_session.closed:
-            await self._http_session.close()
+        """Release client resources
+        
+        The HTTP session is shared with other clients and is left open;
+        call close_shared_session() once at shutdown.
+        """
     
-    async def chat(
-        self,
+    @staticmethod
+    def _build_request_body(
         message: str,
-        model: str = "gemini-2.0-flash",
         system_prompt: Optional[str] = None,
         history: Optional[List[Dict[str, str]]] = None,
     ) -> Dict[str, Any]:
-        """Send chat message using captured Antigravity credentials
-        
-        Args:
-            message: User message
-            model: Model to use (default: gemini-2.0-flash)
-            system_prompt: Optional system prompt
-            history: Optional conversation history
-            
-        Returns:
-            Response dict with 'text' and 'model' keys
-        """
-        session = await self._get_http_session()
-        
-        # Build Gemini API request
+        """Build Gemini API request body"""
         contents = []
         
         # Add history
@@ -194,43 +270,164 @@ class AntigravityReplayClient:
                 "parts": [{"text": system_prompt}]
             }
         
+        return request_body
+    
+    async def _stream_chunks(
+        self,
+        message: str,
+        model: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict[str, str]]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """POST to the streaming endpoint and yield each decoded SSE event"""
+        session = await self._get_http_session()
+        request_body = self._build_request_body(message, system_prompt, history)
+        
         # Use the endpoint format we captured from Antigravity
         # This might be different from the standard Gemini API
-        url = f"{GEMINI_API_BASE}/models/{model}:generateContent"
+        url = _stream_url(model)
         
-        print(f"[REPLAY] POST {url}")
-        print(f"[REPLAY] Headers: {list(session.headers.keys())}")
+        logger.debug("POST %s", url)
+        logger.debug("Headers: %s", self.session.get_request_headers().keys())
         
-        async with session.post(url, json=request_body) as response:
+        async with session.post(
+            url,
+            json=request_body,
+            headers=self.session.get_request_headers(),
+        ) as response:
             if response.status != 200:
                 error_text = await response.text()
                 raise RuntimeError(f"API error {response.status}: {error_text}")
             
-            result = await response.json()
+            # SSE: events are separated by a blank line, payload lines
+            # are prefixed with "data:"
+            data_lines: List[str] = []
+            async for raw in response.content:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+                elif not line and data_lines:
+                    yield _loads("\n".join(data_lines))
+                    data_lines = []
+            
+            if data_lines:
+                yield _loads("\n".join(data_lines))
+    
+    async def chat_stream(
+        self,
+        message: str,
+        model: str = "gemini-2.0-flash",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> AsyncIterator[str]:
+        """Stream a chat response, yielding text deltas as they arrive
         
-        # Parse response
-        candidates = result.get("candidates", [])
-        if not candidates:
-            raise RuntimeError("No response candidates")
+        Args:
+            message: User message
+            model: Model to use (default: gemini-2.0-flash)
+            system_prompt: Optional system prompt
+            history: Optional conversation history
+            
+        Yields:
+            Text fragments of the model response
+        """
+        async for chunk in self._stream_chunks(message, model, system_prompt, history):
+            candidates = chunk.get("candidates", ())
+            if not candidates:
+                continue
+            
+            parts = candidates[0].get("content", {}).get("parts", ())
+            text = "".join(p["text"] for p in parts if "text" in p)
+            if text:
+                yield text
+    
+    async def chat(
+        self,
+        message: str,
+        model: str = "gemini-2.0-flash",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        """Send chat message using captured Antigravity credentials
         
+        Consumes the streaming endpoint and joins the result.
+        
+        Args:
+            message: User message
+            model: Model to use (default: gemini-2.0-flash)
+            system_prompt: Optional system prompt
+            history: Optional conversation history
+            
+        Returns:
+            Response dict with 'text' and 'model' keys
+        """
         text_parts = []
-        for part in candidates[0].get("content", {}).get("parts", []):
-            if "text" in part:
-                text_parts.append(part["text"])
+        usage: Dict[str, Any] = {}
+        got_candidates = False
+        
+        async for chunk in self._stream_chunks(message, model, system_prompt, history):
+            # Usage metadata is cumulative; the last event has the totals
+            usage = chunk.get("usageMetadata", usage)
+            
+            candidates = chunk.get("candidates", ())
+            if not candidates:
+                continue
+            got_candidates = True
+            
+            parts = candidates[0].get("content", {}).get("parts", ())
+            text_parts.append("".join(p["text"] for p in parts if "text" in p))
+        
+        if not got_candidates:
+            raise RuntimeError("No response candidates")
         
         return {
             "text": "".join(text_parts),
             "model": model,
-            "usage": result.get("usageMetadata", {}),
+            "usage": usage,
         }
     
+    async def chat_batch(
+        self,
+        messages: List[str],
+        *,
+        concurrency: int = 8,
+        **kwargs: Any,
+    ) -> List[Any]:
+        """Send several chat messages concurrently
+        
+        Each message is sent as an independent request sharing the same
+        model/system_prompt/history. Requests go through the shared HTTP
+        session, so up to `concurrency` of them reuse pooled connections.
+        
+        Args:
+            messages: User messages to send
+            concurrency: Maximum number of in-flight requests
+            **kwargs: Passed through to chat()
+            
+        Returns:
+            List of response dicts (or exceptions), in the order of `messages`
+        """
+        sem = asyncio.Semaphore(concurrency)
+        
+        async def one(message: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.chat(message, **kwargs)
+        
+        return await asyncio.gather(
+            *(one(message) for message in messages),
+            return_exceptions=True,
+        )
+    
     async def list_models(self) -> List[Dict[str, Any]]:
         """List available models"""
         session = await self._get_http_session()
         
         url = f"{GEMINI_API_BASE}/models"
         
-        async with session.get(url) as response:
+        async with session.get(
+            url,
+            headers=self.session.get_request_headers(),
+        ) as response:
             if response.status != 200:
                 error_text = await response.text()
                 raise RuntimeError(f"API error {response.status}: {error_text}")
@@ -241,13 +438,60 @@ class AntigravityReplayClient:
     
     def get_captured_headers(self) -> Dict[str, str]:
         """Get the captured IDE headers (for debugging)"""
-        return self.session.headers.copy()
+        return dict(self.session.headers)
 
 
 # =============================================================================
 # CLI
 # =============================================================================
 
+# Bytes read from stdin but not yet returned by _ainput()
+_stdin_pending = bytearray()
+
+
+async def _wait_readable(fd: int):
+    """Wait until fd has data (or EOF) without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def on_readable():
+        if not future.done():
+            future.set_result(None)
+    
+    try:
+        loop.add_reader(fd, on_readable)
+    except PermissionError:
+        return  # Regular files can't be polled, but reads never block
+    try:
+        await future
+    finally:
+        loop.remove_reader(fd)
+
+
+async def _ainput(prompt: str) -> str:
+    """input() that doesn't block the event loop
+    
+    Waits for stdin on the event loop itself, so keep-alive connections in
+    the shared session are serviced while waiting and no thread is left
+    blocked on stdin at exit. Raises EOFError at end of input.
+    """
+    print(prompt, end="", flush=True)
+    fd = sys.stdin.fileno()
+    
+    while b"\n" not in _stdin_pending:
+        await _wait_readable(fd)
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            if _stdin_pending:
+                break  # Last line without a trailing newline
+            raise EOFError
+        _stdin_pending.extend(chunk)
+    
+    line, _, rest = bytes(_stdin_pending).partition(b"\n")
+    _stdin_pending[:] = rest
+    return line.decode(sys.stdin.encoding or "utf-8", errors="replace").rstrip("\r")
+
+
 async def main():
     import argparse
     
@@ -275,6 +519,11 @@ async def main():
         action="store_true",
         help="Show captured headers"
     )
+    parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="Log outgoing requests"
+    )
     parser.add_argument(
         "message",
         nargs="?",
@@ -283,6 +532,10 @@ async def main():
     
     args = parser.parse_args()
     
+    if args.verbose:
+        logging.basicConfig(format="[REPLAY] %(message)s")
+        logger.setLevel(logging.DEBUG)
+    
     try:
         client = AntigravityReplayClient.from_captured_session(args.session)
     except FileNotFoundError as e:
@@ -317,7 +570,7 @@ async def main():
             
             while True:
                 try:
-                    message = input("You: ").strip()
+                    message = (await _ainput("You: ")).strip()
                     if message.lower() in ("quit", "exit", "q"):
                         break
                     if not message:
@@ -326,7 +579,7 @@ async def main():
                     response = await client.chat(message, model=args.model)
                     print(f"\nAssistant: {response['text']}\n")
                     
-                except KeyboardInterrupt:
+                except EOFError:
                     print("\n")
                     break
         else:
@@ -336,7 +589,11 @@ async def main():
     
     finally:
         await client.close()
+        await close_shared_session()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n")
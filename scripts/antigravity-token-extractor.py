@@ -17,16 +17,39 @@ Usage:
 
 import argparse
 import asyncio
+import functools
 import json
 import os
 import signal
 import subprocess
 import sys
+import threading
 import time
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Callable, Dict, Any, List, Tuple
 import shutil
 
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -34,6 +57,9 @@ import shutil
 # Output location for op-dbus
 OPDBUS_TOKEN_FILE = Path.home() / ".config" / "antigravity" / "token.json"
 
+# Token files larger than this are not credentials and are skipped
+MAX_TOKEN_FILE_SIZE = 64 * 1024
+
 # Known token storage locations for various Google tools
 TOKEN_PATHS = [
     # Gemini CLI locations
@@ -55,6 +81,38 @@ TOKEN_PATHS = [
     Path.home() / ".config" / "firebase" / "tokens.json",
 ]
 
+
+@dataclass(frozen=True, slots=True)
+class _TokenPath:
+    """Token path with its parent/name precomputed (Path properties allocate)."""
+    path: Path
+    parent: Path
+    name: str
+    parent_str: str
+
+
+_TOKEN_PATHS: Tuple[_TokenPath, ...] = tuple(
+    _TokenPath(path, path.parent, path.name, str(path.parent))
+    for path in TOKEN_PATHS
+)
+
+# TOKEN_PATHS grouped by parent directory (names kept in priority order)
+_PATHS_BY_PARENT: Dict[Path, Tuple[str, ...]] = {}
+for _tp in _TOKEN_PATHS:
+    _PATHS_BY_PARENT[_tp.parent] = _PATHS_BY_PARENT.get(_tp.parent, ()) + (_tp.name,)
+del _tp
+
+# Token fields always set by normalize_token, with their defaults
+_BASE_DEFAULTS = {
+    'access_token': '',
+    'refresh_token': '',
+    'token_type': 'Bearer',
+    'scope': '',
+}
+
+# Optional token fields copied only when present
+_OPT_KEYS = ('client_id', 'client_secret', 'quota_project_id', 'expires_in')
+
 # Commands that might contain Gemini CLI
 GEMINI_COMMANDS = [
     "gemini",
@@ -67,6 +125,7 @@ GEMINI_COMMANDS = [
 # TOKEN EXTRACTION
 # =============================================================================
 
+@functools.lru_cache(maxsize=1)
 def find_gemini_command() -> Optional[str]:
     """Find the Gemini CLI command if installed."""
     for cmd in GEMINI_COMMANDS:
@@ -75,37 +134,53 @@ def find_gemini_command() -> Optional[str]:
     return None
 
 
+def _has_token_data(path: Path) -> bool:
+    """Check whether a file contains usable token data."""
+    try:
+        with open(path, 'rb') as f:
+            # Skip empty or implausibly large files before reading them
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_TOKEN_FILE_SIZE:
+                return False
+            raw = f.read()
+        # Cheap byte scan before paying for a full JSON parse
+        if b'access_token' not in raw and b'refresh_token' not in raw:
+            return False
+        data = _loads(raw)
+        return 'access_token' in data or 'refresh_token' in data
+    except Exception:
+        return False
+
+
 def find_existing_token() -> Optional[Path]:
     """Check known paths for existing tokens."""
-    for path in TOKEN_PATHS:
-        if path.exists():
-            try:
-                with open(path) as f:
-                    data = json.load(f)
-                    # Check if it has useful token data
-                    if 'access_token' in data or 'refresh_token' in data:
-                        print(f"✅ Found token at: {path}")
-                        return path
-            except (json.JSONDecodeError, IOError):
+    # One directory listing per parent instead of one stat per path
+    for parent, names in _PATHS_BY_PARENT.items():
+        try:
+            with os.scandir(parent) as entries:
+                present = {e.name for e in entries if e.name in names and e.is_file()}
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        
+        for name in names:
+            if name not in present:
                 continue
+            path = parent / name
+            # Check if it has useful token data
+            if _has_token_data(path):
+                print(f"✅ Found token at: {path}")
+                return path
     return None
 
 
 def normalize_token(data: Dict[str, Any], source: str) -> Dict[str, Any]:
     """Normalize token to a consistent format."""
-    token = {
-        'access_token': data.get('access_token', ''),
-        'refresh_token': data.get('refresh_token', ''),
-        'token_type': data.get('token_type', 'Bearer'),
-        'scope': data.get('scope', ''),
-        'saved_at': time.time(),
-        'source': source,
-    }
+    token = {k: data.get(k, default) for k, default in _BASE_DEFAULTS.items()}
+    token['saved_at'] = time.time()
+    token['source'] = source
     
     # Copy optional fields
-    for key in ['client_id', 'client_secret', 'quota_project_id', 'expires_in']:
-        if key in data:
-            token[key] = data[key]
+    token.update({k: data[k] for k in _OPT_KEYS if k in data})
     
     # Calculate expiry
     if 'expires_at' in data:
@@ -115,7 +190,6 @@ def normalize_token(data: Dict[str, Any], source: str) -> Dict[str, Any]:
     elif 'expiry' in data:
         # Handle ISO format expiry
         try:
-            from datetime import datetime
             exp = datetime.fromisoformat(data['expiry'].replace('Z', '+00:00'))
             token['expires_at'] = exp.timestamp()
         except:
@@ -128,18 +202,19 @@ def save_token(token: Dict[str, Any]) -> None:
     """Save token to op-dbus location."""
     OPDBUS_TOKEN_FILE.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(OPDBUS_TOKEN_FILE, 'w') as f:
-        json.dump(token, f, indent=2)
-    
-    os.chmod(OPDBUS_TOKEN_FILE, 0o600)
+    # Create with 0600 so the token is never briefly world-readable; the
+    # mode only applies to new files, so also tighten an existing one
+    fd = os.open(OPDBUS_TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        os.fchmod(fd, 0o600)
+        f.write(_dumps(token))
     print(f"✅ Token saved to: {OPDBUS_TOKEN_FILE}")
 
 
 def extract_token_from_path(path: Path) -> bool:
     """Extract and save token from a file path."""
     try:
-        with open(path) as f:
-            data = json.load(f)
+        data = _loads(path.read_bytes())
         
         token = normalize_token(data, str(path))
         save_token(token)
@@ -153,32 +228,181 @@ def extract_token_from_path(path: Path) -> bool:
 # WATCH MODE
 # =============================================================================
 
+class _TokenFileHandler(FileSystemEventHandler):
+    """Filesystem event handler that reports the first valid token file."""
+    
+    def __init__(self, parent: Path, names: Tuple[str, ...],
+                 on_found: Callable[[Path], None]):
+        super().__init__()
+        self.parent = parent
+        self.names = names
+        self.on_found = on_found
+        self.path: Optional[Path] = None
+    
+    def _check(self, src: str) -> None:
+        path = Path(src)
+        if self.path is not None or path.name not in self.names:
+            return
+        if _has_token_data(path):
+            self.path = self.parent / path.name
+            self.on_found(self.path)
+    
+    def on_created(self, event):
+        if not event.is_directory:
+            self._check(event.src_path)
+    
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._check(event.src_path)
+    
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._check(event.dest_path)
+
+
+def _start_token_observer(on_found: Callable[[Path], None]) -> Optional["Observer"]:
+    """Start a watchdog observer with one watch per token parent directory.
+    
+    on_found is called from the observer thread with each detected token path.
+    Returns None if the watches cannot be set up (e.g. the inotify instance
+    or open file limit is reached), so callers can fall back to polling.
+    """
+    observer = Observer()
+    try:
+        for parent, names in _PATHS_BY_PARENT.items():
+            parent.mkdir(parents=True, exist_ok=True)
+            handler = _TokenFileHandler(parent, names, on_found)
+            observer.schedule(handler, str(parent), recursive=False)
+        observer.start()
+    except OSError as e:
+        print(f"⚠️  Cannot watch token directories ({e}), falling back to polling")
+        # Stops and unschedules any emitters that did start
+        observer.stop()
+        return None
+    return observer
+
+
 def watch_for_tokens(timeout_secs: int = 300) -> bool:
     """Watch for token files to appear."""
+    if Observer is None:
+        return poll_for_tokens(timeout_secs)
+    
+    found = threading.Event()
+    found_paths: List[Path] = []
+    
+    def on_found(path: Path) -> None:
+        found_paths.append(path)
+        found.set()
+    
+    observer = _start_token_observer(on_found)
+    if observer is None:
+        return poll_for_tokens(timeout_secs)
+    
     print(f"👀 Watching for token files (timeout: {timeout_secs}s)...")
+    try:
+        deadline = time.monotonic() + timeout_secs
+        while not found.wait(timeout=min(1.0, max(0.0, deadline - time.monotonic()))):
+            if time.monotonic() >= deadline:
+                print("\n❌ Timeout waiting for token")
+                return False
+            print(".", end="", flush=True)
+    finally:
+        observer.stop()
+        observer.join()
+    
+    path = found_paths[0]
+    print(f"\n✅ Token file detected: {path}")
+    return extract_token_from_path(path)
+
+
+async def watch_for_tokens_async(timeout_secs: int = 300) -> bool:
+    """Watch for token files to appear without blocking the event loop.
+    
+    Cancelling the awaiting task stops the watch. Without watchdog, or if
+    the observer cannot start, this falls back to running poll_for_tokens
+    in a thread, which cannot be interrupted by cancellation.
+    """
+    if Observer is None:
+        return await asyncio.to_thread(poll_for_tokens, timeout_secs)
+    
+    loop = asyncio.get_running_loop()
+    found = asyncio.Event()
+    found_paths: List[Path] = []
+    
+    def record(path: Path) -> None:
+        found_paths.append(path)
+        found.set()
+    
+    observer = _start_token_observer(
+        lambda path: loop.call_soon_threadsafe(record, path)
+    )
+    if observer is None:
+        return await asyncio.to_thread(poll_for_tokens, timeout_secs)
+    
+    print(f"👀 Watching for token files (timeout: {timeout_secs}s)...")
+    try:
+        await asyncio.wait_for(found.wait(), timeout=timeout_secs)
+    except asyncio.TimeoutError:
+        print("\n❌ Timeout waiting for token")
+        return False
+    finally:
+        observer.stop()
+        await asyncio.to_thread(observer.join)
+    
+    path = found_paths[0]
+    print(f"\n✅ Token file detected: {path}")
+    return extract_token_from_path(path)
+
+
+def _dir_mtime(parent: str) -> Optional[int]:
+    """Get a directory's mtime in ns, or None if it does not exist."""
+    try:
+        return os.stat(parent).st_mtime_ns
+    except OSError:
+        return None
+
+
+def poll_for_tokens(timeout_secs: int = 300) -> bool:
+    """Poll for token files to appear (fallback when watchdog is unavailable)."""
+    print(f"👀 Watching for token files (timeout: {timeout_secs}s)...")
+    
+    # Directory mtimes only change when entries are created, removed or
+    # renamed, so missing files are only re-checked when their parent changes
+    parent_mtimes = {tp.parent_str: _dir_mtime(tp.parent_str) for tp in _TOKEN_PATHS}
     
     # Get initial mtimes
-    initial_mtimes = {}
-    for path in TOKEN_PATHS:
-        if path.exists():
-            initial_mtimes[path] = path.stat().st_mtime
+    file_mtimes: Dict[Path, int] = {}
+    for tp in _TOKEN_PATHS:
+        try:
+            file_mtimes[tp.path] = tp.path.stat().st_mtime_ns
+        except OSError:
+            pass
     
     start_time = time.time()
     while time.time() - start_time < timeout_secs:
-        for path in TOKEN_PATHS:
-            if path.exists():
-                current_mtime = path.stat().st_mtime
-                # Check if file is new or modified
-                if path not in initial_mtimes or current_mtime > initial_mtimes.get(path, 0):
-                    # Verify it has valid content
-                    try:
-                        with open(path) as f:
-                            data = json.load(f)
-                        if 'access_token' in data or 'refresh_token' in data:
-                            print(f"\n✅ Token file detected: {path}")
-                            return extract_token_from_path(path)
-                    except:
-                        pass
+        changed = set()
+        for parent, last_mtime in parent_mtimes.items():
+            mtime = _dir_mtime(parent)
+            if mtime != last_mtime:
+                parent_mtimes[parent] = mtime
+                changed.add(parent)
+        
+        for tp in _TOKEN_PATHS:
+            # Known files are still stat'ed: in-place rewrites don't touch the directory
+            if tp.path not in file_mtimes and tp.parent_str not in changed:
+                continue
+            try:
+                mtime = tp.path.stat().st_mtime_ns
+            except OSError:
+                continue
+            
+            # Check if file is new or modified
+            if mtime != file_mtimes.get(tp.path):
+                file_mtimes[tp.path] = mtime
+                # Verify it has valid content
+                if _has_token_data(tp.path):
+                    print(f"\n✅ Token file detected: {tp.path}")
+                    return extract_token_from_path(tp.path)
         
         print(".", end="", flush=True)
         time.sleep(1)
@@ -191,6 +415,64 @@ def watch_for_tokens(timeout_secs: int = 300) -> bool:
 # RUN GEMINI CLI
 # =============================================================================
 
+def _signal_process_group(proc: asyncio.subprocess.Process, sig: int) -> None:
+    """Send a signal to a subprocess started with start_new_session=True."""
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _watch_failed(watch_task: "asyncio.Task[bool]") -> bool:
+    """Whether the token watcher task finished by raising."""
+    return (
+        watch_task.done()
+        and not watch_task.cancelled()
+        and watch_task.exception() is not None
+    )
+
+
+async def _wait_for_process_or_token(
+    proc: asyncio.subprocess.Process,
+    watch_task: "asyncio.Task[bool]",
+    timeout: float,
+    stdin: Optional[bytes] = None,
+) -> bool:
+    """Wait until proc exits or the token watcher finishes, whichever is first.
+    
+    proc and its process group are terminated if still running afterwards.
+    Returns False if neither finished within timeout.
+    """
+    proc_task = asyncio.ensure_future(proc.communicate(input=stdin))
+    deadline = time.monotonic() + timeout
+    try:
+        done, _ = await asyncio.wait(
+            {proc_task, watch_task},
+            timeout=timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        # A watcher that raised found nothing; let the CLI run out its time
+        if proc_task not in done and _watch_failed(watch_task):
+            done, _ = await asyncio.wait(
+                {proc_task},
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+    finally:
+        if proc.returncode is None:
+            # Signal the whole group: the CLI may be a wrapper script whose
+            # children would otherwise keep running and hold the pipes open
+            _signal_process_group(proc, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                _signal_process_group(proc, signal.SIGKILL)
+                await proc.wait()
+        _, pending = await asyncio.wait({proc_task}, timeout=1)
+        for task in pending:
+            task.cancel()
+    return bool(done)
+
+
 async def run_gemini_and_capture():
     """Run Gemini CLI and capture the OAuth token it creates."""
     gemini_cmd = find_gemini_command()
@@ -201,49 +483,53 @@ async def run_gemini_and_capture():
     print(f"🚀 Found Gemini CLI: {gemini_cmd}")
     print("   This will launch Gemini CLI which may trigger OAuth...")
     
-    # Start watching for tokens in background
-    watch_task = asyncio.create_task(asyncio.to_thread(watch_for_tokens, 120))
+    # Start watching for tokens in background; each CLI run below is raced
+    # against it so we return as soon as a token shows up
+    watch_task = asyncio.create_task(watch_for_tokens_async(120))
     
-    # Run Gemini CLI
     try:
-        # Try running a simple command to trigger auth
-        proc = await asyncio.create_subprocess_exec(
-            gemini_cmd, "--help",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        await asyncio.wait_for(proc.wait(), timeout=30)
-    except asyncio.TimeoutError:
-        print("   --help timed out, trying interactive...")
-    except Exception as e:
-        print(f"   Error running --help: {e}")
-    
-    # If no token yet, try interactive
-    if not watch_task.done():
+        # Run Gemini CLI
         try:
-            print("   Trying interactive query...")
+            # Try running a simple command to trigger auth
             proc = await asyncio.create_subprocess_exec(
-                gemini_cmd,
-                stdin=asyncio.subprocess.PIPE,
+                gemini_cmd, "--help",
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
             )
-            stdout, stderr = await asyncio.wait_for(
-                proc.communicate(input=b"Hello\n"),
-                timeout=60
-            )
+            if not await _wait_for_process_or_token(proc, watch_task, timeout=30):
+                print("   --help timed out, trying interactive...")
+        except Exception as e:
+            print(f"   Error running --help: {e}")
+        
+        # If no token yet, try interactive
+        if not watch_task.done() or _watch_failed(watch_task):
+            try:
+                print("   Trying interactive query...")
+                proc = await asyncio.create_subprocess_exec(
+                    gemini_cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+                if not await _wait_for_process_or_token(
+                    proc, watch_task, timeout=60, stdin=b"Hello\n"
+                ):
+                    print("   Interactive query timed out")
+            except Exception as e:
+                print(f"   Error: {e}")
+        
+        # Wait for watch task
+        try:
+            return await asyncio.wait_for(watch_task, timeout=10)
         except asyncio.TimeoutError:
-            print("   Interactive query timed out")
+            return False
         except Exception as e:
-            print(f"   Error: {e}")
-    
-    # Wait for watch task
-    try:
-        result = await asyncio.wait_for(watch_task, timeout=10)
-        return result
-    except asyncio.TimeoutError:
+            print(f"   Token watcher failed: {e}")
+            return False
+    finally:
         watch_task.cancel()
-        return False
 
 
 # =============================================================================
@@ -251,6 +537,8 @@ async def run_gemini_and_capture():
 # =============================================================================
 
 def main():
+    global OPDBUS_TOKEN_FILE
+    
     parser = argparse.ArgumentParser(
         description="Extract OAuth token from Gemini CLI for op-dbus"
     )
@@ -265,7 +553,6 @@ def main():
     
     args = parser.parse_args()
     
-    global OPDBUS_TOKEN_FILE
     OPDBUS_TOKEN_FILE = args.output
     
     print("\n╔════════════════════════════════════════════════════════════════╗")